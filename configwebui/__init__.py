@@ -12,49 +12,198 @@ __email__ = "myxlc55@outlook.com"
 __license__ = "MIT"
 __url__ = "https://github.com/lucienshawls/py-config-web-ui"
 __description__ = "A simple web-based configuration editor for Python applications."
-__dependencies__ = ["Flask", "jsonschema"]
+__dependencies__ = [
+    "Flask>=2.2",
+    "Flask-Compress",
+    "Werkzeug>=0.15",
+    "jsonschema>=4.0",
+    "orjson",
+]
 __keywords__ = ["configuration", "editor", "web", "tool", "json", "yaml", "ui", "flask"]
 __all__ = ["ConfigEditor", "UserConfig", "ResultStatus"]
 
 
 import os
 import sys
+import pickle
+import multiprocessing
 import time
 import logging
 import threading
+import re
+import json
+import orjson
 import webbrowser
 from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from flask_compress import Compress
 from io import StringIO
+from queue import Queue, LifoQueue, Empty, Full
 from copy import deepcopy
+from hashlib import blake2b
+from functools import lru_cache
 from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
 from socket import setdefaulttimeout
 from werkzeug.serving import make_server
-from jsonschema import validate, ValidationError
+from werkzeug.middleware.shared_data import SharedDataMiddleware
+from jsonschema.validators import validator_for
+from jsonschema.exceptions import best_match
+from jsonschema.protocols import Validator
 
 SERVER_TIMEOUT = 3
 DAEMON_CHECK_INTERVAL = 1
 READ_STREAM_INTERVAL = 0.01
+THREAD_OUTPUT_BUFFER_SIZE = 4096
+IO_POOL_SIZE = 8
+SCHEMA_VALIDATION_CACHE_SIZE = 128
+EXTRA_VALIDATION_TIMEOUT = 60
+# (stdout, stderr) buffer pairs left over by finished runs, reused by later ones
+IO_POOL: LifoQueue[tuple[StringIO, StringIO]] = LifoQueue(maxsize=IO_POOL_SIZE)
+# Worker processes for CPU-bound extra validations, created on first use
+PROCESS_POOL: ProcessPoolExecutor | None = None
+PROCESS_POOL_LOCK = threading.Lock()
+# orjson reads integers beyond 64 bits as floats, so text holding numbers this
+# long is left to the standard library
+LONG_NUMBER_PATTERN = re.compile(r"\d{19}")
+LONG_NUMBER_BYTES_PATTERN = re.compile(rb"\d{19}")
 BASE_OUTPUT_STREAM = sys.stdout
 BASE_ERROR_STREAM = sys.stderr
 logging.getLogger("werkzeug").disabled = True
 
 
+def get_process_pool() -> ProcessPoolExecutor:
+    global PROCESS_POOL
+    with PROCESS_POOL_LOCK:
+        if PROCESS_POOL is None:
+            # Workers are spawned rather than forked from the threaded server
+            PROCESS_POOL = ProcessPoolExecutor(
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return PROCESS_POOL
+
+
+def discard_process_pool(pool: ProcessPoolExecutor, kill: bool = False) -> None:
+    global PROCESS_POOL
+    with PROCESS_POOL_LOCK:
+        # Another thread may already have replaced the broken pool
+        if PROCESS_POOL is pool:
+            PROCESS_POOL = None
+    # Running tasks cannot be cancelled, and the executor has no public way
+    # to stop its workers, so they are killed directly; shutting down clears
+    # the process table, hence it is read first
+    processes = list((pool._processes or {}).values()) if kill else []
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.kill()
+
+
+def shutdown_process_pool() -> None:
+    with PROCESS_POOL_LOCK:
+        pool = PROCESS_POOL
+    if pool is not None:
+        discard_process_pool(pool, kill=True)
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs) -> str:
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(
+                obj, default=kwargs.get("default", self.default), option=option
+            ).decode()
+        except orjson.JSONEncodeError:
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s: str | bytes, **kwargs):
+        if isinstance(s, str):
+            long_number = LONG_NUMBER_PATTERN.search(s)
+        else:
+            long_number = LONG_NUMBER_BYTES_PATTERN.search(s)
+        # Flask before 3.0 passes object_hook to restore tagged session values
+        if kwargs or long_number:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
+def dump_json_bytes(
+    obj, sort_keys: bool = False, default: Callable | None = None
+) -> bytes:
+    # orjson refuses some values that the standard library accepts, such as
+    # integers beyond 64 bits
+    try:
+        return orjson.dumps(
+            obj, default=default, option=orjson.OPT_SORT_KEYS if sort_keys else None
+        )
+    except orjson.JSONEncodeError:
+        return json.dumps(
+            obj, sort_keys=sort_keys, default=default, separators=(",", ":")
+        ).encode()
+
+
 class ThreadOutputStream:
     def __init__(self, base_stream: StringIO) -> None:
         self.base_stream = base_stream
         self.streams: dict[str, StringIO] = {}
-
-    def add_stream(self, thread_id: int, stream: StringIO) -> None:
+        # Writes of redirected threads are buffered per thread and pushed to
+        # their streams line by line, so that the stream's lock is taken once
+        # per line rather than once per write. A buffer is only ever pushed as
+        # a whole while holding the lock, which keeps the content in order.
+        self.pending: dict[str, list[str]] = {}
+        self.locks: dict[str, threading.Lock] = {}
+
+    def add_stream(
+        self, thread_id: int, stream: StringIO, lock: threading.Lock = None
+    ) -> None:
+        if lock is None:
+            lock = threading.Lock()
+        self.pending[thread_id] = []
+        self.locks[thread_id] = lock
         self.streams[thread_id] = stream
 
+    def remove_stream(self, thread_id: int) -> None:
+        stream = self.streams.pop(thread_id, None)
+        pending = self.pending.pop(thread_id, None)
+        lock = self.locks.pop(thread_id, None)
+        if stream is not None and pending:
+            self.drain(stream, pending, lock)
+
+    @staticmethod
+    def drain(stream: StringIO, pending: list[str], lock: threading.Lock) -> None:
+        with lock:
+            stream.write("".join(pending))
+            pending.clear()
+
     def write(self, message: str) -> None:
+        if not self.streams:
+            # No redirected threads, skip the per-thread lookup
+            self.base_stream.write(message)
+            return
         key = threading.current_thread().name
-        stream = self.streams.get(key, self.base_stream)
-        stream.write(message)
+        stream = self.streams.get(key)
+        if stream is None:
+            self.base_stream.write(message)
+            return
+        pending = self.pending[key]
+        pending.append(message)
+        if "\n" in message or sum(map(len, pending)) >= THREAD_OUTPUT_BUFFER_SIZE:
+            self.drain(stream, pending, self.locks[key])
 
     def flush(self) -> None:
+        if not self.streams:
+            self.base_stream.flush()
+            return
         key = threading.current_thread().name
-        stream = self.streams.get(key, self.base_stream)
+        stream = self.streams.get(key)
+        if stream is None:
+            self.base_stream.flush()
+            return
+        self.drain(stream, self.pending[key], self.locks[key])
         stream.flush()
 
 
@@ -76,6 +225,9 @@ class ProgramRunner:
         self.hide_terminal_error = hide_terminal_error
 
         self.lock = threading.Lock()
+        # Guards the capture buffers, which are written by the program thread
+        # and read by the capture thread
+        self.io_lock = threading.Lock()
 
         self.output = ""
         self.recently_added_output = ""
@@ -83,6 +235,10 @@ class ProgramRunner:
         self.error = ""
         self.recently_added_error = ""
 
+        # Queues of live listeners, each fed (output, error) chunks as they
+        # are captured and None once the program has finished
+        self.subscribers: list[Queue] = []
+
     def capture_output(self) -> None:
         pointer_out = 0
         pointer_err = 0
@@ -90,19 +246,25 @@ class ProgramRunner:
         while True:
             if not self.program_thread.is_alive():
                 capture_complete = True
+                # Let writes from other threads take the fast path again
+                out = sys.stdout
+                err = sys.stderr
+                if isinstance(out, ThreadOutputStream):
+                    out.remove_stream(self.program_thread.name)
+                if isinstance(err, ThreadOutputStream):
+                    err.remove_stream(self.program_thread.name)
+
+            with self.io_lock:
+                self.io_out.seek(pointer_out)
+                new_out = self.io_out.read()
+                pointer_out += len(new_out)
+
+                self.io_err.seek(pointer_err)
+                new_err = self.io_err.read()
+                pointer_err += len(new_err)
 
-            self.io_out.seek(pointer_out)
-            new_out = self.io_out.read()
-            pointer_out += len(new_out)
-            self.io_out.seek(pointer_out)
             if not self.hide_terminal_output:
                 print(new_out, end="", file=BASE_OUTPUT_STREAM)
-
-            self.io_err.seek(pointer_err)
-            new_err = self.io_err.read()
-            pointer_err += len(new_err)
-            self.io_err.seek(pointer_err)
-
             if not self.hide_terminal_error:
                 print(new_err, end="", file=BASE_ERROR_STREAM)
 
@@ -113,37 +275,71 @@ class ProgramRunner:
                 self.error += new_err
                 self.recently_added_error += new_err
 
+                if new_out or new_err:
+                    for subscriber in self.subscribers:
+                        subscriber.put_nowait((new_out, new_err))
+
                 if capture_complete:
+                    for subscriber in self.subscribers:
+                        subscriber.put_nowait(None)
+                    self.subscribers.clear()
+                    self.release_io()
                     self.running = False
                     break
             time.sleep(READ_STREAM_INTERVAL)
 
+    def acquire_io(self) -> None:
+        try:
+            self.io_out, self.io_err = IO_POOL.get_nowait()
+        except Empty:
+            self.io_out = StringIO()
+            self.io_err = StringIO()
+
+    def release_io(self) -> None:
+        for io in (self.io_out, self.io_err):
+            io.seek(0)
+            io.truncate(0)
+        try:
+            IO_POOL.put_nowait((self.io_out, self.io_err))
+        except Full:
+            pass
+
     def run_in_separate_context(self, *args, **kwargs) -> None:
-        if isinstance(sys.stdout, ThreadOutputStream):
-            sys.stdout.add_stream(threading.current_thread().name, self.io_out)
-        if isinstance(sys.stderr, ThreadOutputStream):
-            sys.stderr.add_stream(threading.current_thread().name, self.io_err)
-        self.function(*args, **kwargs)
+        out = sys.stdout
+        err = sys.stderr
+        thread_name = threading.current_thread().name
+        if isinstance(out, ThreadOutputStream):
+            out.add_stream(thread_name, self.io_out, lock=self.io_lock)
+        if isinstance(err, ThreadOutputStream):
+            err.add_stream(thread_name, self.io_err, lock=self.io_lock)
+        try:
+            self.function(*args, **kwargs)
+        finally:
+            # Push out whatever is left without a trailing newline
+            out.flush()
+            err.flush()
 
     def run(self, *args, **kwargs) -> None:
-        if self.running:
-            return ResultStatus(False, "Program is already running")
-        self.output = ""
-        self.recently_added_output = ""
+        # Requests are served concurrently, so checking and claiming the
+        # runner has to happen in one step
+        with self.lock:
+            if self.running:
+                return ResultStatus(False, "Program is already running")
+            self.output = ""
+            self.recently_added_output = ""
 
-        self.error = ""
-        self.recently_added_error = ""
+            self.error = ""
+            self.recently_added_error = ""
 
-        self.io_out = StringIO()
-        self.io_err = StringIO()
+            self.acquire_io()
 
-        self.running = True
-        self.program_thread = threading.Thread(
-            target=self.run_in_separate_context, args=args, kwargs=kwargs
-        )
-        self.capture_thread = threading.Thread(target=self.capture_output)
-        self.program_thread.start()
-        self.capture_thread.start()
+            self.running = True
+            self.program_thread = threading.Thread(
+                target=self.run_in_separate_context, args=args, kwargs=kwargs
+            )
+            self.capture_thread = threading.Thread(target=self.capture_output)
+            self.program_thread.start()
+            self.capture_thread.start()
         return ResultStatus(True)
 
     def get_output(self, recent_only: bool = False) -> str:
@@ -164,6 +360,21 @@ class ProgramRunner:
             self.recently_added_error = ""
         return error
 
+    def subscribe(self) -> Queue:
+        subscriber = Queue()
+        with self.lock:
+            subscriber.put_nowait((self.output, self.error))
+            if self.running:
+                self.subscribers.append(subscriber)
+            else:
+                subscriber.put_nowait(None)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Queue) -> None:
+        with self.lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+
     def wait_for_join(self) -> None:
         if hasattr(self, "program_thread"):
             self.program_thread.join()
@@ -176,6 +387,8 @@ class ProgramRunner:
 
 
 class ResultStatus:
+    __slots__ = ("status", "messages")
+
     def set_status(self, status: bool) -> None:
         self.status = bool(status)
 
@@ -189,15 +402,14 @@ class ResultStatus:
         return self.messages
 
     def __init__(self, status: bool, message: list[str] | str = None) -> None:
-        self.set_status(status)
+        self.status = bool(status)
         self.messages = []
         if message is None:
             return
-        if isinstance(message, list):
-            for m in message:
-                self.add_message(str(m))
-        elif isinstance(message, str):
-            self.add_message(message)
+        if isinstance(message, str):
+            self.messages.append(str(message))
+        elif isinstance(message, list):
+            self.messages.extend(map(str, message))
         else:
             raise TypeError(
                 f"message must be a string or a list of strings, not {type(message)}"
@@ -299,14 +511,28 @@ class UserConfig:
             )
             return result
         if not skip_schema_validations:
+            # Identical configs are often submitted again and again, so the
+            # outcome is remembered by the config's canonical JSON encoding
             try:
-                validate(instance=config, schema=self.schema)
-            except ValidationError as e:
+                config_json = orjson.dumps(config, option=orjson.OPT_SORT_KEYS)
+            except orjson.JSONEncodeError:
+                config_json = None
+            # The cache validates the decoded copy, so it is only used when
+            # that copy equals the config; orjson writes NaN and Infinity as
+            # null, which would otherwise be validated in their place
+            if config_json is None or orjson.loads(config_json) != config:
+                schema_error = self.get_schema_error(config)
+            else:
+                schema_error = self.get_cached_schema_error(config_json)
+            if schema_error is not None:
                 result.set_status(False)
-                result.add_message(f"Schema validation error: {e.message}")
+                result.add_message(f"Schema validation error: {schema_error}")
                 return result
         if not skip_extra_validations:
-            extra_validation_result = self.extra_validation_func(config)
+            if self.extra_validation_in_process:
+                extra_validation_result = self.run_extra_validation_in_process(config)
+            else:
+                extra_validation_result = self.extra_validation_func(config)
             if isinstance(extra_validation_result, ResultStatus):
                 return extra_validation_result
             else:
@@ -316,6 +542,22 @@ class UserConfig:
                     return result
         return result
 
+    def run_extra_validation_in_process(self, config: dict | list):
+        # A pool whose worker died is broken for good, so it is replaced by a
+        # fresh one and the validation is tried once more
+        for _ in range(2):
+            pool = get_process_pool()
+            try:
+                future = pool.submit(self.extra_validation_func, config)
+                return future.result(timeout=EXTRA_VALIDATION_TIMEOUT)
+            except BrokenProcessPool:
+                discard_process_pool(pool)
+            except TimeoutError:
+                # The worker would otherwise keep running the validation
+                discard_process_pool(pool, kill=True)
+                return ResultStatus(False, "Extra validation timed out")
+        return ResultStatus(False, "Extra validation could not be run")
+
     def set_config(
         self,
         config: dict | list = None,
@@ -334,7 +576,9 @@ class UserConfig:
             skip_extra_validations=skip_extra_validations,
         )
         if result.get_status():
-            self.config = config
+            with self.lock:
+                self.config = config
+                self.config_version += 1
             return ResultStatus(True)
         else:
             return result
@@ -351,9 +595,35 @@ class UserConfig:
     def get_schema(self) -> dict:
         return self.schema
 
+    def get_schema_json_bytes(self) -> bytes:
+        # The schema does not change after construction, so serialize it once
+        if self.schema_json_bytes is None:
+            self.schema_json_bytes = dump_json_bytes(self.schema)
+        return self.schema_json_bytes
+
     def get_config(self) -> dict | list:
         return self.config
 
+    def get_etag(self) -> str:
+        with self.lock:
+            return f"{self.etag_prefix}-{self.config_version}"
+
+    def get_validator(self) -> Validator:
+        return self.validator
+
+    def set_validator(self, validator: Validator) -> None:
+        self.validator = validator
+        self.get_cached_schema_error.cache_clear()
+
+    def get_schema_error(self, config: dict | list) -> str | None:
+        error = best_match(self.validator.iter_errors(config))
+        if error is None:
+            return None
+        return error.message
+
+    def get_schema_error_from_json(self, config_json: bytes) -> str | None:
+        return self.get_schema_error(orjson.loads(config_json))
+
     def __init__(
         self,
         name: str = "user_config",
@@ -361,6 +631,7 @@ class UserConfig:
         schema: dict = None,
         extra_validation_func: Callable = default_extra_validation_func,
         save_func: Callable = default_save_func,
+        extra_validation_in_process: bool = False,
     ) -> None:
         if not isinstance(name, str):
             raise TypeError(
@@ -377,6 +648,14 @@ class UserConfig:
                 f"extra_validation_func must be a callable function, not {type(extra_validation_func)}"
             )
         self.extra_validation_func = extra_validation_func
+        # A function that cannot be pickled cannot be sent to a worker process
+        # and keeps running in the calling thread
+        self.extra_validation_in_process = bool(extra_validation_in_process)
+        if self.extra_validation_in_process:
+            try:
+                pickle.dumps(extra_validation_func)
+            except (pickle.PicklingError, AttributeError, TypeError):
+                self.extra_validation_in_process = False
         if not callable(save_func):
             raise TypeError(
                 f"extra_validation_func must be a callable function, not {type(extra_validation_func)}"
@@ -391,7 +670,19 @@ class UserConfig:
         if not isinstance(schema, dict):
             raise TypeError(f"schema must be a dictionary, not {type(schema)}")
         self.schema = UserConfig.add_order(schema)
+        self.schema_json_bytes: bytes | None = None
+        validator_class = validator_for(self.schema)
+        validator_class.check_schema(self.schema)
+        self.validator: Validator = validator_class(self.schema)
+        self.get_cached_schema_error = lru_cache(maxsize=SCHEMA_VALIDATION_CACHE_SIZE)(
+            self.get_schema_error_from_json
+        )
+        self.lock = threading.Lock()
         self.config = {}
+        # Bumped on every config change; the random prefix keeps ETags from
+        # matching those handed out before a restart
+        self.config_version = 0
+        self.etag_prefix = os.urandom(8).hex()
 
 
 class ConfigEditor:
@@ -400,7 +691,10 @@ class ConfigEditor:
         return ResultStatus(False, "Main entry is undefined")
 
     def __init__(
-        self, app_name: str = "Config Editor", main_entry: Callable = default_main_entry
+        self,
+        app_name: str = "Config Editor",
+        main_entry: Callable = default_main_entry,
+        trust_client_validation: bool = False,
     ) -> None:
         from . import app
         from .config import AppConfig
@@ -411,13 +705,20 @@ class ConfigEditor:
             raise TypeError(
                 f"main_entry must be a callable function, not {type(main_entry)}"
             )
-        self.running = False
+        # Whether the web editor may skip server-side schema validation for
+        # configs that it has already validated itself
+        self.trust_client_validation = bool(trust_client_validation)
+        self.stop_event = threading.Event()
         self.main_entry_runner = ProgramRunner(
             function=main_entry,
             hide_terminal_output=False,
             hide_terminal_error=False,
         )
         self.config_store: dict[str, UserConfig] = {}
+        self.user_config_names_set: frozenset[str] | None = None
+        # Compiled validators keyed by a hash of their schema, so that user
+        # configs sharing a schema also share a validator
+        self.validator_cache: dict[bytes, Validator] = {}
 
         flask_app = Flask(
             import_name=app_name,
@@ -425,16 +726,31 @@ class ConfigEditor:
             static_folder="static",
             root_path=os.path.dirname(os.path.abspath(__file__)),
         )
+        flask_app.json = ORJSONProvider(flask_app)
         flask_app.config.from_object(AppConfig)
         flask_app.config["app_name"] = app_name
         flask_app.config["ConfigEditor"] = self
-        flask_app.register_blueprint(app.main)
+        flask_app.jinja_env.globals["version"] = __version__
+        # Keep block tags from leaving blank lines and indentation behind
+        flask_app.jinja_env.trim_blocks = True
+        flask_app.jinja_env.lstrip_blocks = True
+        # Serve static files before requests reach the Flask view layer
+        flask_app.wsgi_app = SharedDataMiddleware(
+            flask_app.wsgi_app,
+            {"/static": os.path.join(flask_app.root_path, "static")},
+            cache_timeout=flask_app.config["SEND_FILE_MAX_AGE_DEFAULT"],
+        )
+        flask_app.register_blueprint(app.make_blueprint(self))
+        Compress(flask_app)
+        # Compile the URL map now rather than on the first request
+        flask_app.url_map.update()
 
         self.app = flask_app
 
     def delete_user_config(self, user_config_name: str) -> None:
         if user_config_name in self.config_store:
             del self.config_store[user_config_name]
+            self.user_config_names_set = None
         else:
             raise KeyError(f"Config {user_config_name} not found")
 
@@ -450,11 +766,29 @@ class ConfigEditor:
         user_config_name = user_config.get_name()
         if user_config_name in self.config_store and not replace:
             raise KeyError(f"Config {user_config_name} already exists")
+        self.share_validator(user_config)
         self.config_store[user_config_name] = user_config
+        self.user_config_names_set = None
+
+    def share_validator(self, user_config: UserConfig) -> None:
+        key = blake2b(
+            dump_json_bytes(user_config.get_schema(), sort_keys=True, default=str)
+        ).digest()
+        validator = self.validator_cache.setdefault(key, user_config.get_validator())
+        if validator is not user_config.get_validator():
+            user_config.set_validator(validator)
+
+    def get_trust_client_validation(self) -> bool:
+        return self.trust_client_validation
 
     def get_user_config_names(self) -> list[str]:
         return list(self.config_store.keys())
 
+    def get_user_config_names_set(self) -> frozenset[str]:
+        if self.user_config_names_set is None:
+            self.user_config_names_set = frozenset(self.config_store)
+        return self.user_config_names_set
+
     def get_user_config(self, user_config_name: str) -> UserConfig:
         if user_config_name in self.config_store:
             return self.config_store[user_config_name]
@@ -465,7 +799,7 @@ class ConfigEditor:
         return self.main_entry_runner.run()
 
     def stop_server(self) -> None:
-        self.running = False
+        self.stop_event.set()
 
     def start_server(self) -> None:
         self.server.serve_forever()
@@ -483,8 +817,15 @@ class ConfigEditor:
         for user_config_name in self.get_user_config_names():
             self.get_user_config(user_config_name).save_func_runner.wait_for_join()
         self.main_entry_runner.wait_for_join()
+        shutdown_process_pool()
         print("All remaining threads stopped.")
 
+    def open_browser(self, url: str) -> None:
+        try:
+            webbrowser.open_new_tab(url)
+        except webbrowser.Error:
+            pass
+
     def run(self, host="localhost", port=80) -> None:
         url = (
             f"http://"
@@ -494,21 +835,26 @@ class ConfigEditor:
         print(f"Config Editor URL: {url}")
         print("Open the above link in your browser if it does not pop up.")
         print("\nPress Ctrl+C to stop.")
-        if not self.app.config["DEBUG"]:
-            threading.Timer(1, lambda: webbrowser.open(url)).start()
         setdefaulttimeout(SERVER_TIMEOUT)
-        self.server = make_server(host, port, self.app)
+        # Threaded, so that long-lived output streams do not block other requests
+        self.server = make_server(host, port, self.app, threaded=True)
 
         sys.stdout = ThreadOutputStream(base_stream=BASE_OUTPUT_STREAM)
         sys.stderr = ThreadOutputStream(base_stream=BASE_ERROR_STREAM)
 
         self.server_thread = threading.Thread(target=self.start_server)
         self.server_thread.start()
-        self.running = True
-        while self.running:
+        # The socket is already bound, so the browser can connect right away.
+        # Console browsers block until they exit, so the call must not hold
+        # up the loop below that handles Ctrl+C and shuts the server down.
+        if not self.app.config["DEBUG"]:
+            threading.Thread(target=self.open_browser, args=(url,), daemon=True).start()
+        self.stop_event.clear()
+        # The timeout only keeps Ctrl+C responsive where a blocking wait
+        # cannot be interrupted (Windows); a shutdown request wakes us at once
+        while not self.stop_event.is_set():
             try:
-                time.sleep(DAEMON_CHECK_INTERVAL)
+                self.stop_event.wait(DAEMON_CHECK_INTERVAL)
             except KeyboardInterrupt:
-                if self.running:
-                    self.stop_server()
+                self.stop_server()
         self.clean_up()
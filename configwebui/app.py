@@ -1,6 +1,9 @@
-from . import ConfigEditor
+import orjson
+from . import ConfigEditor, UserConfig, dump_json_bytes
 from flask import (
     Blueprint,
+    Response,
+    g,
     flash,
     redirect,
     render_template,
@@ -9,216 +12,259 @@ from flask import (
     current_app,
     request,
 )
-from markupsafe import escape
-
-
-main = Blueprint("main", __name__)
-
-
-@main.route("/")
-@main.route("/config")
-def index():
-    current_config_editor: ConfigEditor = current_app.config["ConfigEditor"]
-    current_user_config_name = current_config_editor.get_user_config_names()[0]
-    current_user_config_object = current_config_editor.get_user_config(
-        user_config_name=current_user_config_name
-    )
-    flash(
-        f"You are currently editing: "
-        f'<a class="alert-link" href="/config/{escape(current_user_config_name)}">'
-        f"{escape(current_user_config_object.get_friendly_name())}"
-        f"</a>",
-        "info",
-    )
-    return redirect(
-        url_for("main.user_config_page", user_config_name=current_user_config_name)
-    )
-
-
-@main.route("/config/<user_config_name>", methods=["GET", "POST"])
-def user_config_page(user_config_name):
-    current_config_editor: ConfigEditor = current_app.config["ConfigEditor"]
-    user_config_names = current_config_editor.get_user_config_names()
-    if user_config_name not in user_config_names:
-        flash(f"No such config: <strong>{escape(user_config_name)}</strong>", "danger")
-        return redirect(url_for("main.index"))
-    else:
-        return render_template(
-            "index.html",
-            title=current_app.config["app_name"],
-            user_config_store=current_config_editor.config_store,
-            current_user_config_name=user_config_name,
+from queue import Empty
+from functools import wraps
+from markupsafe import Markup
+
+STREAM_HEARTBEAT_INTERVAL = 15
+
+# HTML messages are prepared once as Markup; format() escapes the names that
+# are filled in and leaves already safe Markup arguments untouched
+NO_SUCH_CONFIG_MESSAGE = Markup("No such config: <strong>{}</strong>")
+USER_CONFIG_LINK = Markup('<a class="alert-link" href="{}">{}</a>')
+CURRENTLY_EDITING_MESSAGE = Markup("You are currently editing: {}")
+SAVED_TO_MEMORY_MESSAGE = Markup("{} has been saved to memory.")
+SAVED_ONLY_TO_MEMORY_MESSAGE = Markup(
+    "{} has been saved <strong>ONLY</strong> to memory."
+)
+SAVE_REQUESTED_MESSAGE = Markup(
+    "A data-saving script has been successfully requested to run. "
+    '<a href="#save-output" class="alert-link">'
+    "Check it out below"
+    "</a>."
+)
+LAUNCH_REQUESTED_MESSAGE = Markup(
+    "The main program has been successfully requested to run. "
+    '<a href="#main-output" class="alert-link">'
+    "Check it out below"
+    "</a>."
+)
+
+
+def make_blueprint(config_editor: ConfigEditor) -> Blueprint:
+    # The editor is fixed for the lifetime of the app, so the views use it
+    # from this closure instead of looking it up in current_app.config
+    main = Blueprint("main", __name__)
+
+    # Resolves the view's user config into g.user_config, answering unknown
+    # names with a 404 that also carries not_found_fields
+    def resolve_user_config(**not_found_fields):
+        def decorator(view):
+            @wraps(view)
+            def wrapper(user_config_name):
+                if user_config_name not in config_editor.get_user_config_names_set():
+                    return make_response(
+                        {
+                            "success": False,
+                            "messages": [
+                                NO_SUCH_CONFIG_MESSAGE.format(user_config_name)
+                            ],
+                            **not_found_fields,
+                        },
+                        404,
+                    )
+                g.user_config = config_editor.get_user_config(
+                    user_config_name=user_config_name
+                )
+                return view(user_config_name)
+
+            return wrapper
+
+        return decorator
+
+    @main.route("/")
+    @main.route("/config")
+    def index():
+        current_user_config_name = config_editor.get_user_config_names()[0]
+        current_user_config_object = config_editor.get_user_config(
+            user_config_name=current_user_config_name
+        )
+        flash(
+            CURRENTLY_EDITING_MESSAGE.format(
+                USER_CONFIG_LINK.format(
+                    url_for(
+                        "main.user_config_page",
+                        user_config_name=current_user_config_name,
+                    ),
+                    current_user_config_object.get_friendly_name(),
+                )
+            ),
+            "info",
+        )
+        return redirect(
+            url_for("main.user_config_page", user_config_name=current_user_config_name)
         )
 
+    @main.route("/config/<user_config_name>", methods=["GET", "POST"])
+    def user_config_page(user_config_name):
+        if user_config_name not in config_editor.get_user_config_names_set():
+            flash(NO_SUCH_CONFIG_MESSAGE.format(user_config_name), "danger")
+            return redirect(url_for("main.index"))
+        else:
+            return render_template(
+                "index.html",
+                title=current_app.config["app_name"],
+                user_config_store=config_editor.config_store,
+                current_user_config_name=user_config_name,
+            )
 
-@main.route("/api/config/<user_config_name>", methods=["GET", "PATCH"])
-def user_config_api(user_config_name):
-    current_config_editor: ConfigEditor = current_app.config["ConfigEditor"]
-    user_config_names = current_config_editor.get_user_config_names()
-    if user_config_name not in user_config_names:
-        if request.method == "GET":
+    @main.route("/api/config/<user_config_name>", methods=["GET"])
+    @resolve_user_config(config={}, schema={})
+    def user_config_api_get(user_config_name):
+        user_config_object: UserConfig = g.user_config
+        etag = user_config_object.get_etag()
+        # Flask-Compress appends ":<algorithm>" to the ETags it compresses
+        if etag in {tag.partition(":")[0] for tag in request.if_none_match.as_set()}:
+            response = make_response("", 304)
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+        body = b"".join(
+            (
+                b'{"success":true,"messages":[""],"config":',
+                dump_json_bytes(user_config_object.get_config()),
+                b',"schema":',
+                user_config_object.get_schema_json_bytes(),
+                b"}",
+            )
+        )
+        response = make_response(body, 200, {"Content-Type": "application/json"})
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    @main.route("/api/config/<user_config_name>", methods=["PATCH"])
+    @resolve_user_config()
+    def user_config_api_patch(user_config_name):
+        user_config_object: UserConfig = g.user_config
+        uploaded_config = request.json
+        # The web editor validates against the schema before uploading and
+        # says so with skip_schema=1, which is only honoured when the editor
+        # trusts its clients; extra validations always run
+        skip_schema_validations = (
+            config_editor.get_trust_client_validation()
+            and request.args.get("skip_schema") == "1"
+        )
+        res = user_config_object.set_config(
+            config=uploaded_config,
+            skip_schema_validations=skip_schema_validations,
+        )
+        if not res.get_status():
+            messages = res.get_messages()
+            if len(messages) == 0:
+                messages = ["Submitted config did not pass all validations"]
+            return make_response({"success": False, "messages": messages}, 400)
+        link = USER_CONFIG_LINK.format(
+            url_for("main.user_config_page", user_config_name=user_config_name),
+            user_config_object.get_friendly_name(),
+        )
+        if user_config_object.save().get_status():
             return make_response(
                 {
-                    "success": False,
+                    "success": True,
                     "messages": [
-                        f"No such config: <strong>{escape(user_config_name)}</strong>"
+                        SAVED_TO_MEMORY_MESSAGE.format(link),
+                        SAVE_REQUESTED_MESSAGE,
                     ],
-                    "config": {},
-                    "schema": {},
                 },
-                404,
+                200,
             )
         else:
             return make_response(
                 {
                     "success": False,
                     "messages": [
-                        f"No such config: <strong>{escape(user_config_name)}</strong>"
+                        SAVED_ONLY_TO_MEMORY_MESSAGE.format(link),
+                        "Last save data-saving script has not finished yet, please try again later.",
                     ],
                 },
-                404,
+                503,
             )
-    else:
-        user_config_object = current_config_editor.get_user_config(
-            user_config_name=user_config_name
-        )
-        if request.method == "GET":
+
+    @main.route("/api/launch")
+    def launch():
+        res = config_editor.launch_main_entry()
+        if res.get_status():
             return make_response(
                 {
                     "success": True,
-                    "messages": [""],
-                    "config": user_config_object.get_config(),
-                    "schema": user_config_object.get_schema(),
+                    "messages": [LAUNCH_REQUESTED_MESSAGE],
                 },
                 200,
             )
         else:
-            uploaded_config = request.json
-            user_config_object = current_config_editor.get_user_config(
-                user_config_name=user_config_name
+            return make_response(
+                {
+                    "success": False,
+                    "messages": ["Main program is already running"],
+                },
+                503,
             )
-            res = user_config_object.set_config(config=uploaded_config)
-            if res.get_status():
-                if user_config_object.save().get_status():
-                    return make_response(
-                        {
-                            "success": True,
-                            "messages": [
-                                f'<a class="alert-link" '
-                                f'href="/config/{escape(user_config_name)}">'
-                                f"{escape(user_config_object.get_friendly_name())}"
-                                f"</a> has been saved to memory.",
-                                f"A data-saving script has been successfully requested to run. "
-                                f'<a href="#save-output" class="alert-link">'
-                                f"Check it out below"
-                                f"</a>.",
-                            ],
-                        },
-                        200,
-                    )
-                else:
-                    return make_response(
-                        {
-                            "success": False,
-                            "messages": [
-                                f'<a class="alert-link" '
-                                f'href="/config/{escape(user_config_name)}">'
-                                f"{escape(user_config_object.get_friendly_name())}"
-                                f"</a> has been saved <strong>ONLY</strong> to memory.",
-                                "Last save data-saving script has not finished yet, please try again later.",
-                            ],
-                        },
-                        503,
-                    )
 
-            else:
-                messages = res.get_messages()
-                if len(messages) == 0:
-                    messages = ["Submitted config did not pass all validations"]
-                return make_response({"success": False, "messages": messages}, 400)
+    @main.route("/api/shutdown")
+    def shutdown():
+        config_editor.stop_server()
+        return make_response("", 204)
 
-
-@main.route("/api/launch")
-def launch():
-    current_config_editor: ConfigEditor = current_app.config["ConfigEditor"]
-    res = current_config_editor.launch_main_entry()
-    if res.get_status():
+    @main.route("/api/config/<user_config_name>/get_save_output")
+    @resolve_user_config(output="")
+    def get_save_output(user_config_name):
+        save_func_runner = g.user_config.save_func_runner
         return make_response(
             {
                 "success": True,
-                "messages": [
-                    f"The main program has been successfully requested to run. "
-                    f'<a href="#main-output" class="alert-link">'
-                    f"Check it out below"
-                    f"</a>.",
-                ],
+                "messages": [""],
+                "running": save_func_runner.is_running(),
+                "output": save_func_runner.get_output(),
+                "error": save_func_runner.get_error(),
             },
             200,
         )
-    else:
-        return make_response(
-            {
-                "success": False,
-                "messages": ["Main program is already running"],
-            },
-            503,
-        )
-
 
-@main.route("/api/shutdown")
-def shutdown():
-    current_config_editor: ConfigEditor = current_app.config["ConfigEditor"]
-    current_config_editor.stop_server()
-    return make_response("", 204)
-
-
-@main.route("/api/config/<user_config_name>/get_save_output")
-def get_save_output(user_config_name):
-    current_config_editor: ConfigEditor = current_app.config["ConfigEditor"]
-    user_config_names = current_config_editor.get_user_config_names()
-    if user_config_name not in user_config_names:
-        return make_response(
-            {
-                "success": False,
-                "messages": [
-                    f"No such config: <strong>{escape(user_config_name)}</strong>"
-                ],
-                "output": "",
-            },
-            404,
-        )
-    else:
-        user_config_object = current_config_editor.get_user_config(
-            user_config_name=user_config_name
-        )
+    @main.route("/api/get_main_output")
+    def get_main_output():
         return make_response(
             {
                 "success": True,
                 "messages": [""],
-                "running": user_config_object.save_func_runner.is_running(),
-                "output": user_config_object.save_func_runner.get_output(),
-                "error": user_config_object.save_func_runner.get_error(),
+                "running": config_editor.main_entry_runner.is_running(),
+                "output": config_editor.main_entry_runner.get_output(),
+                "error": config_editor.main_entry_runner.get_error(),
             },
             200,
         )
 
+    @main.route("/api/stream_main_output")
+    def stream_main_output():
+        runner = config_editor.main_entry_runner
+        subscriber = runner.subscribe()
+
+        def generate():
+            try:
+                while True:
+                    try:
+                        chunk = subscriber.get(timeout=STREAM_HEARTBEAT_INTERVAL)
+                    except Empty:
+                        yield ":\n\n"
+                        continue
+                    if chunk is None:
+                        yield "event: end\ndata: {}\n\n"
+                        break
+                    output, error = chunk
+                    data = orjson.dumps({"output": output, "error": error}).decode()
+                    yield f"data: {data}\n\n"
+            finally:
+                runner.unsubscribe(subscriber)
+
+        return Response(
+            generate(),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache"},
+        )
+
+    @main.route("/<path:path>")
+    def catch_all(path):
+        flash("Page not found", "danger")
+        return redirect(url_for("main.index"))
 
-@main.route("/api/get_main_output")
-def get_main_output():
-    current_config_editor: ConfigEditor = current_app.config["ConfigEditor"]
-    return make_response(
-        {
-            "success": True,
-            "messages": [""],
-            "running": current_config_editor.main_entry_runner.is_running(),
-            "output": current_config_editor.main_entry_runner.get_output(),
-            "error": current_config_editor.main_entry_runner.get_error(),
-        },
-        200,
-    )
-
-
-@main.route("/<path:path>")
-def catch_all(path):
-    flash("Page not found", "danger")
-    return redirect(url_for("main.index"))
+    return main
@@ -4,3 +4,9 @@ import os
 class AppConfig:
     DEBUG = False
     SECRET_KEY = os.environ.get("SECRET_KEY") or os.urandom(24).hex()
+    # Static URLs carry the package version, so they can be cached for long
+    SEND_FILE_MAX_AGE_DEFAULT = 7 * 24 * 60 * 60
+    COMPRESS_MIMETYPES = ["application/json", "text/html"]
+    COMPRESS_ALGORITHM = ["br", "gzip"]
+    # Output streams must reach the browser as they are produced
+    COMPRESS_STREAMS = False
@@ -151,7 +151,8 @@ async function saveConfig() {
     }
     const configValue = JSON.stringify(editor.getValue());
     try {
-        const response = await fetch(`/api${pathName}`, {
+        // The config has just passed schema validation in the editor
+        const response = await fetch(`/api${pathName}?skip_schema=1`, {
             method: 'PATCH',
             headers: {
                 'Content-Type': 'application/json'
@@ -254,6 +255,42 @@ async function initialize_editor() {
 
 initialize_editor();
 
+function showOutput(outputElement, text) {
+    let scroll = false;
+    if (outputElement.scrollTop + outputElement.clientHeight >= outputElement.scrollHeight) {
+        scroll = true;
+    }
+
+    outputElement.value = text;
+    if (scroll) {
+        outputElement.scrollTop = outputElement.scrollHeight;
+    }
+}
+
+function stream_main_output() {
+    if (typeof EventSource === 'undefined') {
+        get_output('main');
+        return;
+    }
+    let output = '';
+    let error = '';
+    const source = new EventSource('/api/stream_main_output');
+    source.onmessage = event => {
+        const data = JSON.parse(event.data);
+        output += data.output;
+        error += data.error;
+        showOutput(mainOutputElement, output + error);
+    };
+    source.addEventListener('end', () => {
+        source.close();
+    });
+    source.onerror = () => {
+        // Fall back to polling if the stream breaks off
+        source.close();
+        get_output('main');
+    };
+}
+
 function get_output(func_type) {
     let complete = true;
     const intervalId = setInterval(async () => {
@@ -281,16 +318,7 @@ function get_output(func_type) {
                 method: 'GET',
             });
             const data = await response.json();
-
-            let scroll = false;
-            if (outputElement.scrollTop + outputElement.clientHeight >= outputElement.scrollHeight) {
-                scroll = true;
-            }
-
-            outputElement.value = data.output + data.error;
-            if (scroll) {
-                outputElement.scrollTop = outputElement.scrollHeight;
-            }
+            showOutput(outputElement, data.output + data.error);
             if (!data.running) {
                 clearInterval(intervalId);
             }
@@ -354,7 +382,7 @@ const launchActionButtons = document.querySelectorAll('.launch-action');
 launchActionButtons.forEach(button => {
     button.addEventListener('click', async () => {
         if (await launch()) {
-            get_output('main');
+            stream_main_output();
         }
     });
 });
@@ -11,7 +11,7 @@ sys.path.append(os.path.dirname(EXAMPLE_DIRECTORY))
 from configwebui import ConfigEditor, ResultStatus, UserConfig
 from pprint import pprint
 import time
-import json
+import orjson
 
 
 # Decorator to pass the name to the validation/save function
@@ -34,8 +34,8 @@ user_config_names = {
 
 # 1. Prepare the schema, save functions and extra validation functions
 # 1.1. Schema
-with open(f"{EXAMPLE_DIRECTORY}/schema/general.json", "r", encoding="utf-8") as f:
-    schema = json.load(f)
+with open(f"{EXAMPLE_DIRECTORY}/schema/general.json", "rb") as f:
+    schema = orjson.loads(f.read())
 
 
 # 1.2. Custom validation function, will be decorated with process_with_name
@@ -54,8 +54,8 @@ def always_pass(name: str, config: dict | list) -> ResultStatus:
 # 1.3. Custom save function, will be decorated with process_with_name
 def my_save(name: str, config: dict | list) -> ResultStatus:
     # You don't need to perform parameter validation
-    with open(f"{EXAMPLE_DIRECTORY}/config/{name}.json", "w", encoding="utf-8") as f:
-        json.dump(config, f, indent=4)
+    with open(f"{EXAMPLE_DIRECTORY}/config/{name}.json", "wb") as f:
+        f.write(orjson.dumps(config, option=orjson.OPT_INDENT_2))
     pprint(config)
     # No blocking
     time.sleep(3)
@@ -66,8 +66,8 @@ def my_save(name: str, config: dict | list) -> ResultStatus:
 def load_config(name: str) -> dict | list:
     file_path = f"{EXAMPLE_DIRECTORY}/config/{name}.json"
     if os.path.exists(file_path):
-        with open(file_path, "r", encoding="utf-8") as f:
-            config = json.load(f)
+        with open(file_path, "rb") as f:
+            config = orjson.loads(f.read())
     else:
         config = None
     return config
@@ -79,8 +79,8 @@ def my_main_entry() -> None:
     for user_config_name in user_config_names:
         file_path = f"{EXAMPLE_DIRECTORY}/config/{user_config_name}.json"
         if os.path.exists(file_path):
-            with open(file_path, "r", encoding="utf-8") as f:
-                config = json.load(f)
+            with open(file_path, "rb") as f:
+                config = orjson.loads(f.read())
             print(f'{config["name"]} is {config["age"]} years old.')
 
 
@@ -0,0 +1,117 @@
+import sys
+import unittest
+
+import orjson
+from configwebui import ConfigEditor, ThreadOutputStream, UserConfig
+
+SCHEMA = {"type": "object", "properties": {"id": {"type": "integer"}}}
+
+
+class AppTest(unittest.TestCase):
+    def setUp(self):
+        self.config_editor = ConfigEditor(app_name="Test")
+        self.config_editor.add_user_config(
+            user_config=UserConfig(name="test", friendly_name="Test", schema=SCHEMA)
+        )
+        self.client = self.config_editor.app.test_client()
+
+    def tearDown(self):
+        self.config_editor.get_user_config("test").save_func_runner.wait_for_join()
+        self.config_editor.main_entry_runner.wait_for_join()
+
+    def test_get_after_patch_with_big_integer(self):
+        response = self.client.patch(
+            "/api/config/test", json={"id": 123456789012345678901234567890}
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get("/api/config/test")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.get_json()["config"], {"id": 123456789012345678901234567890}
+        )
+
+    def test_json_provider_honours_object_hook(self):
+        json_provider = self.config_editor.app.json
+        self.assertEqual(
+            json_provider.loads('{"a": 1}', object_hook=lambda d: sorted(d)), ["a"]
+        )
+        self.assertEqual(
+            json_provider.loads(json_provider.dumps({"n": 2**70})), {"n": 2**70}
+        )
+
+    def test_skip_schema_needs_trust(self):
+        response = self.client.patch(
+            "/api/config/test?skip_schema=1", json={"id": "not a number"}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.config_editor.trust_client_validation = True
+        response = self.client.patch(
+            "/api/config/test?skip_schema=1", json={"id": "not a number"}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_unchanged_config_is_not_modified(self):
+        response = self.client.get("/api/config/test")
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+        response = self.client.get("/api/config/test", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], etag)
+
+    def test_compressed_etag_is_not_modified(self):
+        self.config_editor.get_user_config("test").set_config(
+            config={"id": 1, "note": "x" * 2000}
+        )
+        headers = {"Accept-Encoding": "gzip"}
+        response = self.client.get("/api/config/test", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        etag = response.headers["ETag"]
+        self.assertTrue(etag.endswith(':gzip"'))
+        response = self.client.get(
+            "/api/config/test", headers={**headers, "If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_get_after_patch_is_modified(self):
+        etag = self.client.get("/api/config/test").headers["ETag"]
+        response = self.client.patch("/api/config/test", json={"id": 7})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get("/api/config/test", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertEqual(response.get_json()["config"], {"id": 7})
+
+    def test_stream_without_running_program_ends(self):
+        response = self.client.get("/api/stream_main_output")
+        self.assertEqual(response.mimetype, "text/event-stream")
+        self.assertTrue(
+            response.get_data(as_text=True).endswith("event: end\ndata: {}\n\n")
+        )
+
+    def test_stream_carries_output_and_ends(self):
+        config_editor = ConfigEditor(
+            app_name="Test", main_entry=lambda: print("hello from main")
+        )
+        config_editor.main_entry_runner.hide_terminal_output = True
+        client = config_editor.app.test_client()
+        stdout = sys.stdout
+        sys.stdout = ThreadOutputStream(base_stream=stdout)
+        try:
+            self.assertEqual(client.get("/api/launch").status_code, 200)
+            body = client.get("/api/stream_main_output").get_data(as_text=True)
+            config_editor.main_entry_runner.wait_for_join()
+        finally:
+            sys.stdout = stdout
+        events = body.split("\n\n")
+        output = "".join(
+            orjson.loads(event[len("data: ") :])["output"]
+            for event in events
+            if event.startswith("data: ") and event != "data: {}"
+        )
+        self.assertEqual(output, "hello from main\n")
+        self.assertIn("event: end\ndata: {}", events)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import sys
+import threading
+import time
+import unittest
+
+from configwebui import ProgramRunner
+
+CONCURRENT_CALLS = 8
+TRIALS = 200
+
+
+class ProgramRunnerTest(unittest.TestCase):
+    def setUp(self):
+        # Switch threads as often as possible, so that races show up reliably
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.switch_interval)
+
+    def test_concurrent_runs_start_once(self):
+        for _ in range(TRIALS):
+            started = []
+            runner = ProgramRunner(
+                function=lambda: started.append(time.sleep(0.01)),
+                hide_terminal_output=True,
+                hide_terminal_error=True,
+            )
+            barrier = threading.Barrier(CONCURRENT_CALLS)
+            results = []
+            errors = []
+
+            def call_run():
+                barrier.wait()
+                try:
+                    results.append(runner.run().get_status())
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [
+                threading.Thread(target=call_run) for _ in range(CONCURRENT_CALLS)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            runner.wait_for_join()
+
+            self.assertEqual(errors, [])
+            self.assertEqual(results.count(True), 1)
+            self.assertEqual(len(started), 1)
+            self.assertFalse(runner.is_running())
+
+    def test_run_again_after_finishing(self):
+        runner = ProgramRunner(
+            function=lambda: None,
+            hide_terminal_output=True,
+            hide_terminal_error=True,
+        )
+        self.assertTrue(runner.run().get_status())
+        runner.wait_for_join()
+        self.assertTrue(runner.run().get_status())
+        runner.wait_for_join()
+        self.assertFalse(runner.is_running())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,24 @@
+import pickle
+import unittest
+
+from configwebui import ResultStatus
+
+
+class ResultStatusTest(unittest.TestCase):
+    def test_rendering_follows_changes(self):
+        result = ResultStatus(True, "first")
+        self.assertIn("first", str(result))
+        result.get_messages().append("second")
+        result.status = False
+        self.assertIn("second", repr(result))
+        self.assertIn("status=False", repr(result))
+        self.assertIn("Fail", str(result))
+
+    def test_pickles(self):
+        result = pickle.loads(pickle.dumps(ResultStatus(False, ["a", "b"])))
+        self.assertFalse(result.get_status())
+        self.assertEqual(result.get_messages(), ["a", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
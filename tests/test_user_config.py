@@ -0,0 +1,107 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+import configwebui
+from configwebui import ResultStatus, UserConfig, shutdown_process_pool
+
+CONCURRENT_CALLS = 8
+UPDATES_PER_THREAD = 200
+
+
+# Extra validations sent to the process pool must be importable by the workers
+def report_pid(config: dict | list) -> ResultStatus:
+    if config.get("crash"):
+        os._exit(1)
+    time.sleep(config.get("sleep", 0))
+    return ResultStatus(True, str(os.getpid()))
+
+
+class UserConfigTest(unittest.TestCase):
+    def setUp(self):
+        # Switch threads as often as possible, so that races show up reliably
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.switch_interval)
+        shutdown_process_pool()
+
+    def test_concurrent_updates_get_distinct_versions(self):
+        user_config = UserConfig(schema={"type": "object"})
+        first_etag = user_config.get_etag()
+        barrier = threading.Barrier(CONCURRENT_CALLS)
+
+        def update():
+            barrier.wait()
+            for i in range(UPDATES_PER_THREAD):
+                user_config.set_config(config={"i": i})
+
+        threads = [threading.Thread(target=update) for _ in range(CONCURRENT_CALLS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(
+            user_config.config_version, CONCURRENT_CALLS * UPDATES_PER_THREAD
+        )
+        self.assertNotEqual(user_config.get_etag(), first_etag)
+
+    def test_non_finite_numbers_are_validated_as_given(self):
+        user_config = UserConfig(
+            schema={"type": "object", "properties": {"a": {"type": "number"}}}
+        )
+        self.assertTrue(user_config.check(config={"a": float("nan")}).get_status())
+        self.assertTrue(user_config.check(config={"a": float("inf")}).get_status())
+        self.assertFalse(user_config.check(config={"a": None}).get_status())
+        self.assertTrue(user_config.check(config={"a": float("nan")}).get_status())
+
+    def test_extra_validation_in_process(self):
+        user_config = UserConfig(
+            schema={"type": "object"},
+            extra_validation_func=report_pid,
+            extra_validation_in_process=True,
+        )
+        self.assertTrue(user_config.extra_validation_in_process)
+        result = user_config.check(config={})
+        self.assertTrue(result.get_status())
+        self.assertNotEqual(result.get_messages(), [str(os.getpid())])
+        self.assertTrue(user_config.set_config(config={}).get_status())
+
+    def test_broken_process_pool_is_replaced(self):
+        user_config = UserConfig(
+            schema={"type": "object"},
+            extra_validation_func=report_pid,
+            extra_validation_in_process=True,
+        )
+        result = user_config.check(config={"crash": True})
+        self.assertFalse(result.get_status())
+        self.assertTrue(user_config.check(config={}).get_status())
+
+    def test_timed_out_validation_is_stopped(self):
+        user_config = UserConfig(
+            schema={"type": "object"},
+            extra_validation_func=report_pid,
+            extra_validation_in_process=True,
+        )
+        # Start the workers before the short timeout applies
+        self.assertTrue(user_config.check(config={}).get_status())
+        timeout = configwebui.EXTRA_VALIDATION_TIMEOUT
+        configwebui.EXTRA_VALIDATION_TIMEOUT = 1
+        try:
+            result = user_config.check(config={"sleep": 30})
+        finally:
+            configwebui.EXTRA_VALIDATION_TIMEOUT = timeout
+        self.assertFalse(result.get_status())
+        # Neither later validations nor shutting down wait for the stuck one
+        start = time.monotonic()
+        self.assertTrue(user_config.check(config={}).get_status())
+        shutdown_process_pool()
+        self.assertLess(time.monotonic() - start, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
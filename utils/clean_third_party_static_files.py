@@ -2,22 +2,24 @@ import os
 
 STATIC_DIRECTORY = "configwebui/static"
 CUSTOM_STATIC_FILES_BY_DIRECTORY = {
-    "css": ["index.css"],
-    "js": ["index.js"],
+    "css": frozenset(["index.css"]),
+    "js": frozenset(["index.js"]),
 }
 
 
 def main():
-    for subdirectory in [
-        subdirectory
-        for subdirectory in os.listdir(STATIC_DIRECTORY)
-        if os.path.isdir(os.path.join(STATIC_DIRECTORY, subdirectory))
-    ]:
-        custom_static_files = CUSTOM_STATIC_FILES_BY_DIRECTORY.get(subdirectory, [])
-        for file in os.listdir(os.path.join(STATIC_DIRECTORY, subdirectory)):
-            if file not in custom_static_files:
-                os.remove(os.path.join(STATIC_DIRECTORY, subdirectory, file))
-                print(f"Removed {os.path.join(STATIC_DIRECTORY, subdirectory, file)}")
+    with os.scandir(STATIC_DIRECTORY) as subdirectories:
+        for subdirectory in subdirectories:
+            if not subdirectory.is_dir(follow_symlinks=False):
+                continue
+            custom_static_files = CUSTOM_STATIC_FILES_BY_DIRECTORY.get(
+                subdirectory.name, frozenset()
+            )
+            with os.scandir(subdirectory.path) as files:
+                for file in files:
+                    if file.name not in custom_static_files:
+                        os.remove(file.path)
+                        print(f"Removed {file.path}")
 
 
 if __name__ == "__main__":
@@ -1,6 +1,10 @@
 import os
 import re
+import shutil
+import sys
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from urllib.parse import urljoin
 
 STATIC_FILE_DIRECTORY = "configwebui/static"
@@ -10,65 +14,123 @@ VERSION = {
     "jquery": "3.7.1",
     "fontawesome": "5.15.4",
 }
-
-
-def save_file(url: str, path: str) -> None:
-    r = requests.get(url)
-    with open(path, "wb") as f:
-        f.write(r.content)
-
-
-def download_json_editor() -> None:
-    save_file(
+# Every URL and destination is known up front, except for the webfonts that
+# the fontawesome stylesheet refers to
+DOWNLOADS = [
+    (
         f'https://cdn.jsdelivr.net/npm/@json-editor/json-editor@{VERSION["json-editor"]}/dist/jsoneditor.min.js',
         f"{STATIC_FILE_DIRECTORY}/js/jsoneditor.min.js",
-    )
-
-
-def download_bootstrap() -> None:
-    save_file(
+    ),
+    (
         f'https://cdn.jsdelivr.net/npm/jquery@{VERSION["jquery"]}/dist/jquery.slim.min.js',
         f"{STATIC_FILE_DIRECTORY}/js/jquery.slim.min.js",
-    )
-    save_file(
+    ),
+    (
         f'https://cdn.jsdelivr.net/npm/bootstrap@{VERSION["bootstrap"]}/dist/js/bootstrap.bundle.min.js',
         f"{STATIC_FILE_DIRECTORY}/js/bootstrap.bundle.min.js",
-    )
-    save_file(
+    ),
+    (
         f'https://cdn.jsdelivr.net/npm/bootstrap@{VERSION["bootstrap"]}/dist/css/bootstrap.min.css',
         f"{STATIC_FILE_DIRECTORY}/css/bootstrap.min.css",
-    )
-
-
-def download_fontawesome() -> None:
-    fontawesome_url = (
-        f'https://use.fontawesome.com/releases/v{VERSION["fontawesome"]}/css/all.css'
-    )
-    save_file(fontawesome_url, f"{STATIC_FILE_DIRECTORY}/css/fontawesome.all.css")
-
-    with open(f"{STATIC_FILE_DIRECTORY}/css/fontawesome.all.css", "r") as f:
-        fontawesome_css = f.read()
-    font_names_raw = re.findall(r"url\(\.\./webfonts/(.*?)\)", fontawesome_css)
-    font_names = set()
-    for font_name_raw in font_names_raw:
-        font_name = re.search(r"^(.*?)(\?.*|#.*)?$", font_name_raw).group(1)
-        font_names.add(font_name)
-    for font_name in font_names:
-        save_file(
-            urljoin(fontawesome_url, f"../webfonts/{font_name}"),
-            f"{STATIC_FILE_DIRECTORY}/webfonts/{font_name}",
+    ),
+]
+FONTAWESOME_CSS_URL = (
+    f'https://use.fontawesome.com/releases/v{VERSION["fontawesome"]}/css/all.css'
+)
+FONTAWESOME_CSS_PATH = f"{STATIC_FILE_DIRECTORY}/css/fontawesome.all.css"
+WEBFONT_DIRECTORY = f"{STATIC_FILE_DIRECTORY}/webfonts"
+DOWNLOAD_WORKERS = 8
+DOWNLOAD_CHUNK_SIZE = 1 << 16
+WRITE_BUFFER_SIZE = 1 << 20
+# Captures the font file name without any query string or fragment
+FONT_URL_PATTERN = re.compile(r"url\(\.\./webfonts/([^?#)]+)")
+
+# Files come from two hosts, so a shared session reuses a few kept-alive
+# connections instead of opening a new one for every file
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+
+def is_saved(path: str) -> bool:
+    # Versions are pinned, so a file that is already there is up to date
+    return os.path.isfile(path) and os.path.getsize(path) > 0
+
+
+def remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def save_file(url: str, path: str, force: bool = False) -> None:
+    if not force and is_saved(path):
+        return
+    # Downloads land in a temporary file first, so that an interrupted one
+    # is not mistaken for a complete file on the next run
+    temp_path = f"{path}.part"
+    try:
+        with SESSION.get(url, stream=True) as r:
+            r.raise_for_status()
+            r.raw.decode_content = True
+            with open(temp_path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+                shutil.copyfileobj(r.raw, f, length=DOWNLOAD_CHUNK_SIZE)
+        os.replace(temp_path, path)
+    except BaseException:
+        remove_file(temp_path)
+        raise
+
+
+# The stylesheet is parsed from the response that is being saved, and is
+# only read back from disk when it has been downloaded before
+def get_fontawesome_css(force: bool = False) -> str:
+    if not force and is_saved(FONTAWESOME_CSS_PATH):
+        with open(FONTAWESOME_CSS_PATH, "r", encoding="utf-8") as f:
+            return f.read()
+    r = SESSION.get(FONTAWESOME_CSS_URL)
+    r.raise_for_status()
+    temp_path = f"{FONTAWESOME_CSS_PATH}.part"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(r.content)
+        os.replace(temp_path, FONTAWESOME_CSS_PATH)
+    except BaseException:
+        remove_file(temp_path)
+        raise
+    return r.content.decode("utf-8")
+
+
+def get_fontawesome_font_files(fontawesome_css: str) -> list[tuple[str, str]]:
+    font_names = set(FONT_URL_PATTERN.findall(fontawesome_css))
+    return [
+        (
+            urljoin(FONTAWESOME_CSS_URL, f"../webfonts/{font_name}"),
+            f"{WEBFONT_DIRECTORY}/{font_name}",
         )
+        for font_name in font_names
+    ]
 
 
-def download_files() -> None:
-    os.makedirs(f"{STATIC_FILE_DIRECTORY}/js", exist_ok=True)
-    os.makedirs(f"{STATIC_FILE_DIRECTORY}/css", exist_ok=True)
-    os.makedirs(f"{STATIC_FILE_DIRECTORY}/webfonts", exist_ok=True)
+def download_files(force: bool = False) -> None:
+    # Every destination directory is created once, before any download starts
+    directories = {os.path.dirname(path) for _, path in DOWNLOADS}
+    directories.update((os.path.dirname(FONTAWESOME_CSS_PATH), WEBFONT_DIRECTORY))
+    for directory in directories:
+        os.makedirs(directory, exist_ok=True)
 
-    download_json_editor()
-    download_bootstrap()
-    download_fontawesome()
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+        futures = [
+            executor.submit(save_file, url, path, force) for url, path in DOWNLOADS
+        ]
+        # The webfonts are only known once the fontawesome stylesheet is in
+        fontawesome_css = get_fontawesome_css(force=force)
+        futures += [
+            executor.submit(save_file, url, path, force)
+            for url, path in get_fontawesome_font_files(fontawesome_css)
+        ]
+        for future in futures:
+            future.result()
 
 
 if __name__ == "__main__":
-    download_files()
+    download_files(force="--force" in sys.argv[1:])